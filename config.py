@@ -1,7 +1,8 @@
 # src/config.py
+import importlib.util
 import os
+import httpx
 from dotenv import load_dotenv
-from openai import OpenAI
 
 load_dotenv()
 
@@ -14,7 +15,29 @@ else:
     BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
     API_KEY = os.getenv("OPENAI_API_KEY")
 
-client = OpenAI(base_url=BASE_URL, api_key=API_KEY)
+# Connection pool limits for the long-lived httpx clients: the OpenAI client
+# from get_client() and the AsyncClient shared by one async ingest run.
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+
+_client = None
+
+def get_client():
+    """
+    Return the shared OpenAI client, creating it on first use so importing
+    config stays cheap.
+    """
+    global _client
+    if _client is None:
+        from openai import OpenAI
+
+        # HTTP/2 needs the optional h2 package (pip install "httpx[http2]").
+        http_client = httpx.Client(
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=HTTP_LIMITS,
+            timeout=30,
+        )
+        _client = OpenAI(base_url=BASE_URL, api_key=API_KEY, http_client=http_client)
+    return _client
 
 LLM_MODEL = os.getenv("LLM_MODEL")
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL")
\ No newline at end of file
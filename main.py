@@ -1,4 +1,6 @@
-from src.ingest import ingest_docs
+import asyncio
+
+from src.ingest import ingest_docs_async
 from src.embeddings import get_embedding
 from src.store import search
 from src.llm import generate
@@ -11,7 +13,7 @@ docs = [
 ]
 
 if __name__ == "__main__":
-    ingest_docs(docs)
+    asyncio.run(ingest_docs_async(docs))
     q = "How do apps use documents to answer questions?"
     qv = get_embedding(q)
     ctx = search(qv, k=3)
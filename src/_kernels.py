@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import numpy as np
+from numba import njit, prange
+
+# Rows scored per parallel task; each task keeps its own top-k.
+_BLOCK = 1024
+
+# Full fastmath would include "ninf", which lets LLVM assume no value is
+# infinite; the top-k slots start at -inf, so leave that flag out.
+@njit(parallel=True, fastmath={"contract", "reassoc", "nsz", "arcp"}, cache=True)
+def _block_topk(mat, q, k, scale):
+    n, d = mat.shape
+    nblocks = (n + _BLOCK - 1) // _BLOCK
+    idx = np.full((nblocks, k), -1, dtype=np.int64)
+    sims = np.full((nblocks, k), -np.inf, dtype=np.float32)
+    for b in prange(nblocks):
+        for i in range(b * _BLOCK, min((b + 1) * _BLOCK, n)):
+            acc = np.float32(0.0)
+            for j in range(d):
+                acc += np.float32(mat[i, j]) * np.float32(q[j])
+            if scale is not None:
+                acc *= scale[i]
+            if acc > sims[b, k - 1]:
+                # Insertion into the block's descending top-k.
+                pos = k - 1
+                while pos > 0 and sims[b, pos - 1] < acc:
+                    sims[b, pos] = sims[b, pos - 1]
+                    idx[b, pos] = idx[b, pos - 1]
+                    pos -= 1
+                sims[b, pos] = acc
+                idx[b, pos] = i
+    return idx.ravel(), sims.ravel()
+
+def cosine_topk(mat: np.ndarray, q: np.ndarray, k: int, scale: np.ndarray | None = None) -> np.ndarray:
+    """
+    Row indices of the k rows of `mat` with the highest dot product with `q`,
+    best first. Rows and `q` are expected to be unit vectors; for quantized
+    rows, `scale` holds the per-row factor that each dot product is multiplied by.
+    """
+    idx, sims = _block_topk(mat, q, k, scale)
+    keep = idx >= 0
+    idx, sims = idx[keep], sims[keep]
+    return idx[np.argsort(-sims, kind="stable")[:k]]
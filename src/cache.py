@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+_SHA1 = hashlib.sha1()
+
+def content_key(*parts: str) -> bytes:
+    """
+    Hash key for exact-match caches. Keys only need to avoid accidental
+    collisions, so the non-cryptographic xxh3 is used when installed.
+    """
+    data = "\0".join(parts).encode("utf-8")
+    if xxhash is not None:
+        return xxhash.xxh3_128_digest(data)
+    # Copying a pre-built hasher skips its setup; raw digests skip hex encoding.
+    h = _SHA1.copy()
+    h.update(data)
+    return h.digest()
+
+class LRU:
+    """
+    Least-recently-used map that holds at most `maxsize` entries. A lock makes
+    it safe to share between threads.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+# Semantic cache for unit vectors. Random-hyperplane LSH puts similar vectors
+# in the same bucket; a hit must still reach THRESHOLD cosine similarity.
+THRESHOLD = 0.95
+_N_PLANES = 8
+_MAX_ENTRIES = 1024
+
+_planes: np.ndarray | None = None
+_buckets: dict[tuple, list[tuple[np.ndarray, object]]] = {}
+_size = 0
+
+def _bucket(v: np.ndarray, key) -> tuple:
+    global _planes
+    if _planes is None or _planes.shape[1] != v.shape[0]:
+        rng = np.random.default_rng(0)
+        _planes = rng.standard_normal((_N_PLANES, v.shape[0])).astype(np.float32)
+    return key, np.packbits(_planes @ v > 0).tobytes()
+
+def lookup(v: np.ndarray, key=None):
+    for u, value in _buckets.get(_bucket(v, key), ()):
+        if float(u @ v) >= THRESHOLD:
+            return value
+    return None
+
+def remember(v: np.ndarray, value, key=None) -> None:
+    global _size
+    if _size >= _MAX_ENTRIES:
+        clear()
+    _buckets.setdefault(_bucket(v, key), []).append((v, value))
+    _size += 1
+
+def clear() -> None:
+    global _size
+    _buckets.clear()
+    _size = 0
@@ -1,24 +1,110 @@
+import httpx
+import json
 import requests
 import os
+from requests.adapters import HTTPAdapter
+
+from src.cache import LRU, content_key
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 
+# One keep-alive session for every sync call instead of a new connection
+# per request.
+_SESSION = requests.Session()
+_SESSION.mount(OLLAMA_BASE_URL, HTTPAdapter(pool_connections=1, pool_maxsize=8))
+
+# LRU of embeddings keyed by a hash of (model, text): repeated queries and
+# re-ingested texts skip the request entirely. The ingest worker threads
+# share it.
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "4096"))
+_cache = LRU(EMBED_CACHE_SIZE)
+
+def _cache_key(text: str, model: str) -> bytes:
+    return content_key(model, text)
+
+def _parse(content: bytes) -> dict:
+    # Responses are mostly long float arrays; orjson parses them ~5x faster.
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+def _split_cached(texts: list[str], model: str) -> tuple[list[bytes], dict, dict]:
+    # Returns each text's key, the cached vectors by key, and the texts still
+    # to request by key. Duplicates share a key, so each is requested once.
+    keys = [_cache_key(t, model) for t in texts]
+    found = {k: v for k in keys if (v := _cache.get(k)) is not None}
+    missing = {k: t for t, k in zip(texts, keys) if k not in found}
+    return keys, found, missing
+
+def _fill(found: dict, missing: dict, vectors: list[list[float]]) -> None:
+    for k, vec in zip(missing, vectors):
+        _cache.put(k, vec)
+        found[k] = vec
+
 def get_embedding(text: str, model: str = "nomic-embed-text"):
     """
     Generate a vector embedding for the given text using Ollama.
     """
+    key = _cache_key(text, model)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
     try:
-        response = requests.post(
+        response = _SESSION.post(
             f"{OLLAMA_BASE_URL}/api/embeddings",
             json={"model": model, "prompt": text},
             timeout=30,
         )
         response.raise_for_status()
-        data = response.json()
+        data = _parse(response.content)
+        _cache.put(key, data["embedding"])
         return data["embedding"]
-    except requests.RequestException as e:
+    except (requests.RequestException, ValueError) as e:
         raise RuntimeError(f"Embeddings request failed: {e}") from e
 
+def get_embeddings_batch(texts: list[str], model: str = "nomic-embed-text") -> list[list[float]]:
+    """
+    Embed many texts with a single call to Ollama's batch endpoint.
+    """
+    keys, found, missing = _split_cached(texts, model)
+    if missing:
+        try:
+            response = _SESSION.post(
+                f"{OLLAMA_BASE_URL}/api/embed",
+                json={"model": model, "input": list(missing.values())},
+                timeout=30,
+            )
+            response.raise_for_status()
+            data = _parse(response.content)
+        except (requests.RequestException, ValueError) as e:
+            raise RuntimeError(f"Embeddings request failed: {e}") from e
+        _fill(found, missing, data["embeddings"])
+    return [found[k] for k in keys]
+
+async def get_embeddings_batch_async(client: httpx.AsyncClient, texts: list[str], model: str = "nomic-embed-text") -> list[list[float]]:
+    """
+    Async variant of get_embeddings_batch.
+    """
+    keys, found, missing = _split_cached(texts, model)
+    if missing:
+        try:
+            response = await client.post(
+                f"{OLLAMA_BASE_URL}/api/embed",
+                json={"model": model, "input": list(missing.values())},
+                timeout=30,
+            )
+            response.raise_for_status()
+            data = _parse(response.content)
+        except (httpx.HTTPError, ValueError) as e:
+            raise RuntimeError(f"Embeddings request failed: {e}") from e
+        _fill(found, missing, data["embeddings"])
+    return [found[k] for k in keys]
+
 if __name__ == "__main__":
     sample = "Hello, this is a test for embeddings."
     vec = get_embedding(sample)
@@ -1,7 +1,38 @@
-from src.embeddings import get_embedding
-from src.store import add_doc
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from config import HTTP_LIMITS
+from src.embeddings import get_embeddings_batch, get_embeddings_batch_async
+from src.store import add_docs
+
+# Texts per /api/embed request.
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+# Embedding requests in flight at once; matches the embeddings session pool.
+EMBED_WORKERS = 8
+
+def _batches(docs: list[str]) -> list[list[str]]:
+    return [docs[i:i + EMBED_BATCH_SIZE] for i in range(0, len(docs), EMBED_BATCH_SIZE)]
 
 def ingest_docs(docs: list[str]) -> None:
-    for d in docs:
-        v = get_embedding(d)
-        add_doc(d, v)
\ No newline at end of file
+    batches = _batches(docs)
+    # Threads only overlap the HTTP calls; inserts stay on this thread.
+    with ThreadPoolExecutor(max_workers=EMBED_WORKERS) as ex:
+        for batch, vecs in zip(batches, ex.map(get_embeddings_batch, batches)):
+            add_docs(batch, vecs)
+
+async def ingest_docs_async(docs: list[str]) -> None:
+    # Embedding requests are network-bound, so send the batches concurrently,
+    # but cap how many are in flight so a large ingest doesn't flood Ollama.
+    batches = _batches(docs)
+    sem = asyncio.Semaphore(EMBED_WORKERS)
+    async with httpx.AsyncClient(limits=HTTP_LIMITS) as client:
+        async def embed(batch: list[str]) -> list[list[float]]:
+            async with sem:
+                return await get_embeddings_batch_async(client, batch)
+
+        results = await asyncio.gather(*(embed(b) for b in batches))
+    for batch, vecs in zip(batches, results):
+        add_docs(batch, vecs)
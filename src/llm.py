@@ -1,16 +1,55 @@
+import json
 import os
+from collections.abc import Iterator
 import requests
+from requests.adapters import HTTPAdapter
 
 from config import BASE_URL, LLM_MODEL
+from src.cache import LRU, content_key
 
-def generate(prompt: str) -> str:
+# Keep-alive session so repeated calls skip the TCP (and TLS) handshake.
+_SESSION = requests.Session()
+_SESSION.mount(BASE_URL, HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+# The prompt embeds the question and the retrieved context, so identical
+# prompts mean the same question over the same documents.
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "256"))
+_cache = LRU(LLM_CACHE_SIZE)
+
+def _cache_key(prompt: str) -> bytes:
+    return content_key(str(LLM_MODEL), prompt)
+
+def generate_stream(prompt: str) -> Iterator[str]:
+    """
+    Yield the answer piece by piece as Ollama produces it, so callers can show
+    the first tokens before generation finishes.
+    """
     try:
-        r = requests.post(
+        # The read timeout applies between chunks, not to the whole answer.
+        with _SESSION.post(
             f"{BASE_URL}/api/generate",
-            json={"model": LLM_MODEL, "prompt": prompt, "stream": False},
-            timeout=30,
-        )
-        r.raise_for_status()
-        return r.json().get("response", "").strip()
-    except requests.RequestException as e:
+            json={"model": LLM_MODEL, "prompt": prompt, "stream": True},
+            stream=True,
+            timeout=(5, 120),
+        ) as r:
+            r.raise_for_status()
+            for line in r.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                # Ollama reports failures mid-stream as an "error" chunk.
+                if "error" in chunk:
+                    raise RuntimeError(f"LLM request failed: {chunk['error']}")
+                yield chunk.get("response", "")
+                if chunk.get("done"):
+                    break
+    except (requests.RequestException, ValueError) as e:
         raise RuntimeError(f"LLM request failed: {e}") from e
+
+def generate(prompt: str) -> str:
+    key = _cache_key(prompt)
+    answer = _cache.get(key)
+    if answer is None:
+        answer = "".join(generate_stream(prompt)).strip()
+        _cache.put(key, answer)
+    return answer
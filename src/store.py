@@ -1,16 +1,183 @@
+from __future__ import annotations
+
+import importlib.util
+import math
+import os
+
 import numpy as np
 
-_docs: list[dict] = []
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
+from src import cache
+
+# Storage for the matrix. The scan is bound on memory bandwidth, so smaller
+# rows scan faster: "float16" halves the float32 footprint, and "int8"
+# quarters it by quantizing each unit vector with its own scale, so its
+# largest component maps to +/-127.
+_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+VECTOR_DTYPE = os.getenv("VECTOR_DTYPE", "float32").lower()
+if VECTOR_DTYPE not in _DTYPES:
+    raise ValueError(f"Unsupported VECTOR_DTYPE: {VECTOR_DTYPE}")
+
+# ANN_SEARCH=1 answers queries from a faiss HNSW graph instead of scanning
+# every row. The vectors then live only in the index, as float32, so
+# VECTOR_DTYPE applies to the exact scan alone.
+ANN_SEARCH = os.getenv("ANN_SEARCH") == "1"
+if ANN_SEARCH and faiss is None:
+    raise ImportError("ANN_SEARCH=1 requires faiss (pip install faiss-cpu)")
+# Candidates kept while walking the graph; higher means better recall and
+# slower queries.
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+
+def _has_blas() -> bool:
+    try:
+        return bool(np.show_config(mode="dicts")["Build Dependencies"]["blas"]["found"])
+    except (KeyError, TypeError):
+        return False
+
+# The numba kernel only beats NumPy when the matmul can't use BLAS: int8 rows
+# (NumPy's integer matmul is a plain loop) or a NumPy built without BLAS.
+# numba has no float16 support. It takes a while to import, so only load it
+# when the kernel will be used.
+_USE_KERNEL = importlib.util.find_spec("numba") is not None and (
+    VECTOR_DTYPE == "int8" or (VECTOR_DTYPE == "float32" and not _has_blas())
+)
+if _USE_KERNEL:
+    try:
+        from src import _kernels
+    except ImportError:
+        _USE_KERNEL = False
+
+# Rows upcast per step when scanning float16 with NumPy.
+_F16_BLOCK = 4096
+
+# Rows are L2-normalized on insert, so one matrix-vector product gives cosine
+# similarity for every document. The buffer doubles when full.
+_mat = np.empty((0, 0), dtype=_DTYPES[VECTOR_DTYPE])
+# Per-row dequantization factors (max |component| / 127) in int8 mode.
+_inv_scales = np.empty(0, dtype=np.float32)
+_texts: list[str] = []
+_index = None
+
+def _l2(v: np.ndarray) -> float:
+    # np.linalg.norm pays for dtype/axis dispatch on every call.
+    return math.sqrt(float(np.vdot(v, v)))
+
+def _normalize(vectors, out: np.ndarray | None = None) -> np.ndarray:
+    # Works on one vector or on a (N, D) block, one row per vector. With
+    # `out`, rows are written there instead of into a new array.
+    v = np.asarray(vectors, dtype=np.float32)
+    if v.ndim == 1:
+        norms = _l2(v) + 1e-9
+    else:
+        norms = np.sqrt(np.einsum("ij,ij->i", v, v))[:, None] + 1e-9
+    return np.divide(v, norms, out=out)
+
+def _quantize(v: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    inv = np.abs(v).max(axis=-1, keepdims=True) / 127 + 1e-12
+    return np.round(v / inv).astype(np.int8), inv[..., 0]
+
+def _encode(v: np.ndarray) -> np.ndarray:
+    # The query's own scale is the same for every row, so ranking ignores it.
+    if VECTOR_DTYPE == "int8":
+        return _quantize(v)[0]
+    return v.astype(_mat.dtype, copy=False)
+
+def _grow(dim: int, needed: int) -> None:
+    global _mat, _inv_scales
+    n = len(_texts)
+    cap = max(2 * _mat.shape[0], 16, needed)
+    buf = np.empty((cap, dim), dtype=_mat.dtype)
+    if n:
+        buf[:n] = _mat[:n]
+    _mat = buf
+    if VECTOR_DTYPE == "int8":
+        scales = np.empty(cap, dtype=np.float32)
+        scales[:n] = _inv_scales[:n]
+        _inv_scales = scales
+
+def _top_k(q: np.ndarray, n: int, k: int) -> np.ndarray:
+    # Backends in order of preference: simsimd, then the numba kernel where it
+    # beats NumPy, then NumPy.
+    scale = _inv_scales[:n] if VECTOR_DTYPE == "int8" else None
+    if simsimd is not None:
+        # Rows are unit vectors, so the dot product already is the cosine.
+        sims = np.asarray(simsimd.cdist(q[None, :], _mat[:n], metric="dot"))[0]
+    elif _USE_KERNEL:
+        return _kernels.cosine_topk(_mat[:n], q, k, scale)
+    elif VECTOR_DTYPE == "int8":
+        # Accumulate in int32; int8 products would overflow.
+        sims = np.matmul(_mat[:n], q, dtype=np.int32)
+    elif VECTOR_DTYPE == "float16":
+        # NumPy has no half-precision GEMV; upcast a block at a time and use
+        # the float32 one.
+        q = q.astype(np.float32)
+        sims = np.empty(n, dtype=np.float32)
+        for i in range(0, n, _F16_BLOCK):
+            sims[i:i + _F16_BLOCK] = _mat[i:min(i + _F16_BLOCK, n)].astype(np.float32) @ q
+    else:
+        sims = _mat[:n] @ q
+    if scale is not None:
+        sims = sims * scale
+    top = np.argpartition(-sims, k - 1)[:k]
+    return top[np.argsort(-sims[top])]
 
 def add_doc(text: str, vector: list[float]) -> None:
-    _docs.append({"text": text, "vec": np.array(vector, dtype=np.float32)})
+    add_docs([text], [vector])
+
+def add_docs(texts: list[str], vectors: list[list[float]]) -> None:
+    global _index
+    if not texts:
+        return
+    m = np.asarray(vectors, dtype=np.float32)
+    if ANN_SEARCH:
+        if _index is None:
+            # Inner product on unit vectors is cosine similarity.
+            _index = faiss.IndexHNSWFlat(m.shape[1], 32, faiss.METRIC_INNER_PRODUCT)
+        # faiss assigns sequential ids, which line up with rows of _texts.
+        _index.add(_normalize(m))
+        _texts.extend(texts)
+        cache.clear()
+        return
+    n = len(_texts)
+    if n + len(texts) > _mat.shape[0]:
+        _grow(m.shape[1], n + len(texts))
+    rows = _mat[n:n + len(texts)]
+    if VECTOR_DTYPE == "int8":
+        rows[:], _inv_scales[n:n + len(texts)] = _quantize(_normalize(m))
+    elif VECTOR_DTYPE == "float16":
+        rows[:] = _normalize(m)
+    else:
+        # Normalize straight into the matrix; no intermediate copy.
+        _normalize(m, out=rows)
+    _texts.extend(texts)
+    # Cached results may no longer be the top-k.
+    cache.clear()
 
 def search(vector: list[float], k: int = 3) -> list[str]:
-    q = np.array(vector, dtype=np.float32)
-    sims = []
-    qn = np.linalg.norm(q) + 1e-9
-    for d in _docs:
-        dn = np.linalg.norm(d["vec"]) + 1e-9
-        sims.append(((q @ d["vec"]) / (qn * dn), d["text"]))
-    sims.sort(key=lambda x: x[0], reverse=True)
-    return [t for _, t in sims[:k]]
\ No newline at end of file
+    n = len(_texts)
+    k = min(k, n)
+    if k <= 0:
+        return []
+    v = _normalize(vector)
+    hit = cache.lookup(v, key=k)
+    if hit is not None:
+        return list(hit)
+    if ANN_SEARCH:
+        # The candidate list must be at least k long to return k hits.
+        params = faiss.SearchParametersHNSW(efSearch=max(k, HNSW_EF_SEARCH))
+        _, ids = _index.search(v[None, :], k, params=params)
+        top = [i for i in ids[0] if i >= 0]
+    else:
+        top = _top_k(_encode(v), n, k)
+    results = [_texts[i] for i in top]
+    cache.remember(v, results, key=k)
+    return list(results)